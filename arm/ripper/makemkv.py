@@ -3,17 +3,32 @@
 Main file for dealing with connecting to MakeMKV and handling errors
 """
 import os
+import csv
+import asyncio
 import logging
 import subprocess
 import shlex
+from dataclasses import dataclass, field
+from typing import Optional
 from time import sleep
 
+import psutil
+
 from arm.models.track import Track
 from arm.ripper import utils  # noqa: E402
 from arm.ui import db  # noqa: F401, E402
 import arm.config.config as cfg  # noqa E402
 from arm.ripper.utils import notify
 
+# makemkvcon robot mode, with messages on stdout so they end up in the job log
+MKV_ROBOT_ARGS = ("-r", "--messages=-stdout")
+# Listing every drive (disc:9999 doesn't exist) is the quickest way to map devices to MakeMKV disc numbers
+MKV_DRIVE_SCAN = ("makemkvcon", "-r", "info", "disc:9999")
+# Bytes of update_key.sh's error output kept for the log, the rest is read and discarded
+MKV_KEY_ERROR_LIMIT = 4096
+# MakeMKV read cache in MB, sized once from the memory in this machine (1/32 of it, between 128 and 1024)
+MKV_CACHE_MB = max(128, min(1024, psutil.virtual_memory().total // (32 * 1024 * 1024)))
+
 
 class MakeMkvRuntimeError(RuntimeError):
     """Exception raised when a CalledProcessError is thrown during execution of a `makemkvcon` command.
@@ -25,7 +40,7 @@ class MakeMkvRuntimeError(RuntimeError):
     def __init__(self, error):
         self.message = f"Call to MakeMKV failed with code: {error.returncode} ({error.output})"
         logging.error(self.message)
-        raise super().__init__(self.message)
+        super().__init__(self.message)
 
 
 def makemkv(logfile, job):
@@ -40,34 +55,26 @@ def makemkv(logfile, job):
     # Get drive mode for the current drive
     mode = utils.get_drive_mode(job.devpath)
     logging.info(f"Job running in {mode} mode")
+    logging.debug("MakeMKV cache size: %s MB", MKV_CACHE_MB)
 
     # confirm MKV is working, beta key hasn't expired
-    prep_mkv(logfile)
+    prep_mkv()
     logging.info(f"Starting MakeMKV rip. Method is {job.config.RIPMETHOD}")
     # get MakeMKV disc number
     logging.debug("Getting MakeMKV disc number")
-    cmd = f"makemkvcon -r info disc:9999 | grep {job.devpath} | grep -oP '(?<=:).*?(?=,)'"
-    logging.debug(f"Using command: {cmd}")
-    try:
-        mdisc = subprocess.check_output(
-            cmd,
-            shell=True
-        ).decode("utf-8")
-        logging.info(f"MakeMKV disc number: {mdisc.strip()}")
-        logging.debug(f"Disk raw number: {mdisc}")
-    except subprocess.CalledProcessError as mdisc_error:
-        raise MakeMkvRuntimeError(mdisc_error) from mdisc_error
+    mdisc = probe_disc(job)
+    logging.info(f"MakeMKV disc number: {mdisc}")
 
     # get filesystem in order
     rawpath = setup_rawpath(job, os.path.join(str(job.config.RAW_PATH), str(job.title)))
     logging.info(f"Processing files to: {rawpath}")
+    max_len = int(job.config.MAXLENGTH)
     # Rip bluray
     if (job.config.RIPMETHOD == "backup" or job.config.RIPMETHOD == "backup_dvd") and job.disctype == "bluray":
         # backup method
-        cmd = f'makemkvcon backup --decrypt {job.config.MKV_ARGS} --minlength={job.config.MINLENGTH}' \
-              f'--progress={os.path.join(job.config.LOGPATH, "progress", str(job.job_id))}.log ' \
-              f'--messages=-stdout ' \
-              f'-r disc:{mdisc.strip()} {shlex.quote(rawpath)}'
+        cmd = mkv_rip_args(job, "backup") + [
+            "--decrypt", f"--minlength={job.config.MINLENGTH}", f"disc:{mdisc}", rawpath,
+        ]
         logging.info("Backing up disc")
         run_makemkv(cmd, logfile)
     # Rip Blu-ray without enhanced protection or dvd disc
@@ -99,11 +106,12 @@ def makemkv(logfile, job):
                 rawpath = None
 
         # if no maximum length, process the whole disc in one command
-        elif int(job.config.MAXLENGTH) > 99998:
-            cmd = f'makemkvcon mkv {job.config.MKV_ARGS} -r ' \
-                  f'--progress={os.path.join(job.config.LOGPATH, "progress", str(job.job_id))}.log ' \
-                  f'--messages=-stdout ' \
-                  f'dev:{job.devpath} all {shlex.quote(rawpath)} --minlength={job.config.MINLENGTH}'
+        # The track scan above is still needed here, move_files_post and handbrake_mkv
+        # rely on the tracks it stores to find and name the ripped files
+        elif max_len > 99998:
+            cmd = mkv_rip_args(job, "mkv") + [
+                f"dev:{job.devpath}", "all", rawpath, f"--minlength={job.config.MINLENGTH}",
+            ]
             run_makemkv(cmd, logfile)
         else:
             process_single_tracks(job, logfile, rawpath, 'auto')
@@ -122,12 +130,10 @@ def rip_mainfeature(job, track, logfile, rawpath):
     logging.info(f"Processing track #{track.track_number} as mainfeature. "
                  f"Length is {track.length} seconds.")
     filepathname = os.path.join(rawpath, track.filename)
-    logging.info(f"Ripping title {track.track_number} to {shlex.quote(filepathname)}")
-    cmd = f'makemkvcon mkv {job.config.MKV_ARGS} -r' \
-          f' --progress={os.path.join(job.config.LOGPATH, "progress", str(job.job_id))}.log' \
-          f' --messages=-stdout ' \
-          f'dev:{job.devpath} {track.track_number} {shlex.quote(rawpath)} ' \
-          f'--minlength={job.config.MINLENGTH}'
+    logging.info(f"Ripping title {track.track_number} to {filepathname}")
+    cmd = mkv_rip_args(job, "mkv") + [
+        f"dev:{job.devpath}", str(track.track_number), rawpath, f"--minlength={job.config.MINLENGTH}",
+    ]
     # Possibly update db to say track was ripped
     run_makemkv(cmd, logfile)
 
@@ -141,84 +147,223 @@ def process_single_tracks(job, logfile, rawpath, mode: str):
     :param str mode: drive mode (auto or manual)
     :return:
     """
-    # process one track at a time based on track length
-    for track in job.tracks:
-        # Process single track automatically based on start and finish times
-        if mode == 'auto':
-            if track.length < int(job.config.MINLENGTH):
-                # too short
-                logging.info(f"Track #{track.track_number} of {job.no_of_titles}. Length ({track.length}) "
-                             f"is less than minimum length ({job.config.MINLENGTH}).  Skipping")
-                track.process = False
-
-            elif track.length > int(job.config.MAXLENGTH):
-                # too long
-                logging.info(f"Track #{track.track_number} of {job.no_of_titles}. "
-                             f"Length ({track.length}) is greater than maximum length ({job.config.MAXLENGTH}).  "
-                             "Skipping")
-                track.process = False
-            else:
-                # track is just right
-                track.process = True
-
-        # Rip the track if the user has set it to rip, or in auto mode and the time is good
-        if track.process:
-            logging.info(f"Processing track #{track.track_number} of {(job.no_of_titles - 1)}. "
-                         f"Length is {track.length} seconds.")
-            filepathname = os.path.join(rawpath, track.filename)
-            logging.info(f"Ripping title {track.track_number} to {shlex.quote(filepathname)}")
-
-            cmd = f'makemkvcon mkv {job.config.MKV_ARGS} -r ' \
-                  f'--progress={os.path.join(job.config.LOGPATH, "progress", str(job.job_id))}.log ' \
-                  f'--messages=-stdout ' \
-                  f'dev:{job.devpath} {track.track_number} {shlex.quote(rawpath)}'
-            run_makemkv(cmd, logfile)
+    asyncio.run(process_single_tracks_async(job, logfile, rawpath, mode))
+
+
+async def process_single_tracks_async(job, logfile, rawpath, mode: str):
+    """
+    Rip the selected tracks one after another\n
+    Only one makemkvcon can use the drive at a time, but while a track is ripping
+    the next one is checked and its command prepared
+    :param job: job object
+    :param str logfile: path of logfile
+    :param str rawpath:
+    :param str mode: drive mode (auto or manual)
+    :return:
+    """
+    min_len = int(job.config.MINLENGTH)
+    max_len = int(job.config.MAXLENGTH)
+    rip_args = mkv_rip_args(job, "mkv")
+    rip = None
+    rip_cmd = None
+    log_fd = open_mkv_log(logfile)
+    try:
+        # process one track at a time based on track length
+        for track in job.tracks:
+            # Process single track automatically based on start and finish times
+            if mode == 'auto':
+                if track.length < min_len:
+                    # too short
+                    logging.info("Track #%s of %s. Length (%s) is less than minimum length (%s).  Skipping",
+                                 track.track_number, job.no_of_titles, track.length, min_len)
+                    track.process = False
+
+                elif track.length > max_len:
+                    # too long
+                    logging.info("Track #%s of %s. Length (%s) is greater than maximum length (%s).  Skipping",
+                                 track.track_number, job.no_of_titles, track.length, max_len)
+                    track.process = False
+                else:
+                    # track is just right
+                    track.process = True
+
+            # Rip the track if the user has set it to rip, or in auto mode and the time is good
+            if track.process:
+                cmd = rip_args + [f"dev:{job.devpath}", str(track.track_number), rawpath]
+                # Wait for the drive to be free before starting the next track
+                if rip is not None:
+                    await wait_makemkv(rip, rip_cmd)
+
+                logging.info("Processing track #%s of %s. Length is %s seconds.",
+                             track.track_number, job.no_of_titles - 1, track.length)
+                filepathname = os.path.join(rawpath, track.filename)
+                logging.info("Ripping title %s to %s", track.track_number, filepathname)
+                logging.debug("Ripping with the following command: %s", cmd)
+                wait_for_rip_slot()
+                rip = await asyncio.create_subprocess_exec(*cmd, stdin=subprocess.DEVNULL, stdout=log_fd,
+                                                           stderr=subprocess.STDOUT)
+                rip_cmd = cmd
+        if rip is not None:
+            await wait_makemkv(rip, rip_cmd)
+    finally:
+        # Never leave makemkvcon running if something went wrong between tracks
+        if rip is not None and rip.returncode is None:
+            rip.terminate()
+            await rip.wait()
+        os.close(log_fd)
+
+
+async def wait_makemkv(rip, cmd):
+    """
+    Wait for a makemkvcon process started with asyncio to finish
+
+    Parameters:
+        rip: asyncio process running makemkvcon
+        cmd: the command the process was started with
+    Raises:
+        MakeMkvRuntimeError
+    """
+    return_code = await rip.wait()
+    if return_code != 0:
+        logging.error("MakeMKV command failed: %s", cmd)
+        mkv_error = subprocess.CalledProcessError(return_code, cmd)
+        raise MakeMkvRuntimeError(mkv_error) from mkv_error
+
+
+def wait_for_rip_slot():
+    """
+    Hold off starting a rip while MAX_CONCURRENT_RIPS makemkvcon processes are running\n
+    This is only checked as each rip starts, two rips starting at the same moment can both go ahead
+    """
+    rip_limit = int(cfg.arm_config.get("MAX_CONCURRENT_RIPS", 0))
+    if rip_limit > 0:
+        utils.sleep_check_process("makemkvcon", rip_limit)
+
+
+def open_mkv_log(logfile):
+    """
+    Open the job logfile for makemkvcon to write to directly\n
+    The descriptor isn't inherited by anything other than the process it is given to
+    :param str logfile: path of logfile
+    :return: file descriptor, the caller must close it
+    """
+    return os.open(logfile, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+
+
+def progress_log_path(job):
+    """
+    Path of the MakeMKV progress log for a job\n
+    :param job: job object
+    :return: path to the progress log
+    """
+    return f"{os.path.join(job.config.LOGPATH, 'progress', str(job.job_id))}.log"
+
+
+def mkv_rip_args(job, command):
+    """
+    Start of a makemkvcon rip command, the caller adds the source and destination\n
+    :param job: job object
+    :param str command: makemkvcon command (mkv or backup)
+    :return: list of arguments
+    """
+    return ["makemkvcon", command, *shlex.split(job.config.MKV_ARGS), *MKV_ROBOT_ARGS,
+            f"--progress={progress_log_path(job)}"]
 
 
 def setup_rawpath(job, raw_path):
     """
-    Checks if we need to create path and does so if needed\n\n
+    Creates the raw path, falling back to a title_stage folder if it is already in use\n\n
     :param job:
     :param raw_path:
     :return: raw_path
     """
 
     logging.info(f"Destination is {raw_path}")
-    if not os.path.exists(raw_path):
+    try:
+        os.makedirs(raw_path, exist_ok=False)
+    except FileExistsError:
+        # Another rip already uses this folder, give this one its own
+        raw_path = os.path.join(str(job.config.RAW_PATH), f"{job.title}_{job.stage}")
+        logging.info(f"Destination already exists, using {raw_path} instead")
         try:
-            os.makedirs(raw_path)
+            os.makedirs(raw_path, exist_ok=True)
         except OSError:
             err = f"Couldn't create the base file path: {raw_path}. Probably a permissions error"
             logging.error(err)
+    except OSError:
+        err = f"Couldn't create the base file path: {raw_path}. Probably a permissions error"
+        logging.error(err)
 
     return raw_path
 
 
-def prep_mkv(logfile):
+def prep_mkv():
     """Make sure the MakeMKV key is up-to-date
 
-    Parameters:
-        logfile: Location of logfile to redirect MakeMKV logs to
     Raises:
         RuntimeError
     """
     try:
         logging.info("Updating MakeMKV key...")
-        update_cmd = "/bin/bash /opt/arm/scripts/update_key.sh"
+        update_cmd = ["/bin/bash", "/opt/arm/scripts/update_key.sh"]
 
         # if MAKEMKV_PERMA_KEY is populated
         if cfg.arm_config['MAKEMKV_PERMA_KEY'] is not None and cfg.arm_config['MAKEMKV_PERMA_KEY'] != "":
             logging.debug("MAKEMKV_PERMA_KEY populated, using that...")
             # add MAKEMKV_PERMA_KEY as an argument to the command
-            update_cmd = f"{update_cmd} {cfg.arm_config['MAKEMKV_PERMA_KEY']}"
-
-        subprocess.run(f"{update_cmd} >> {logfile}", capture_output=True, shell=True, check=True)
+            update_cmd.append(cfg.arm_config['MAKEMKV_PERMA_KEY'])
+
+        with subprocess.Popen(update_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as update:
+            # Only the errors are of any use, keep the start of them and drain the rest
+            errors = update.stderr.read(MKV_KEY_ERROR_LIMIT)
+            while update.stderr.read(MKV_KEY_ERROR_LIMIT):
+                pass
+        if update.returncode != 0:
+            raise subprocess.CalledProcessError(update.returncode, update_cmd, stderr=errors)
     except subprocess.CalledProcessError as update_err:
         err = f"Error updating MakeMKV key, return code: {update_err.returncode}"
         logging.error(err)
+        if update_err.stderr:
+            logging.error(update_err.stderr.decode("utf-8", errors="replace"))
         raise RuntimeError(err) from update_err
 
 
+def probe_disc(job):
+    """
+    Ask MakeMKV for the list of drives and find the disc number for this job\n
+    If MakeMKV rejects the key it is updated and the scan tried once more
+
+    :param job: job object
+    :return: MakeMKV disc number
+    """
+    cmd = list(MKV_DRIVE_SCAN)
+    logging.debug("Using command: %s", cmd)
+    drive_list = subprocess.run(cmd, capture_output=True, encoding="utf-8", errors="replace")
+    if drive_list.returncode == 253:
+        # MakeMKV refuses to run when the key has expired, update it and try once more
+        logging.info("MakeMKV key rejected, updating key and retrying")
+        prep_mkv()
+        drive_list = subprocess.run(cmd, capture_output=True, encoding="utf-8", errors="replace")
+    elif drive_list.returncode not in (0, 10):
+        logging.debug("MakeMKV drive scan returned code: %s", drive_list.returncode)
+
+    mdisc = None
+    for line in drive_list.stdout.splitlines():
+        # DRV:index,visible,enabled,flags,drive name,disc name,device path
+        msg_type, _, payload = line.partition(":")
+        if msg_type != "DRV":
+            continue
+        drive = next(csv.reader([payload]))
+        if drive[-1].strip() == job.devpath:
+            mdisc = drive[0]
+            break
+    if mdisc is None:
+        logging.error(f"MakeMKV didn't list a drive for {job.devpath}")
+        raise MakeMkvRuntimeError(subprocess.CalledProcessError(drive_list.returncode, cmd))
+
+    return mdisc
+
+
 def get_track_info(mdisc, job):
     """
     Use MakeMKV to get track info and update Track class
@@ -233,108 +378,117 @@ def get_track_info(mdisc, job):
 
     logging.info("Using MakeMKV to get information on all the tracks on the disc. This will take a few minutes...")
 
-    cmd = f'makemkvcon -r --progress={os.path.join(job.config.LOGPATH, "progress", str(job.job_id))}.log ' \
-          f'--messages=-stdout --minlength={job.config.MINLENGTH} ' \
-          f'--cache=1 info disc:{mdisc}'
-    logging.debug(f"Sending command: {cmd}")
-    try:
-        mkv = subprocess.check_output(
-            cmd,
-            stderr=subprocess.STDOUT,
-            shell=True
-        ).decode("utf-8").splitlines()
-    except subprocess.CalledProcessError as mdisc_error:
+    cmd = [
+        "makemkvcon", *MKV_ROBOT_ARGS, f"--progress={progress_log_path(job)}",
+        f"--minlength={job.config.MINLENGTH}", f"--cache={MKV_CACHE_MB}", "info", f"disc:{mdisc}",
+    ]
+    logging.debug("Sending command: %s", cmd)
+    state = TrackState()
+    # Parse the output as MakeMKV produces it rather than waiting for the whole scan to finish
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          encoding="utf-8", errors="replace") as mkv:
+        for line in mkv.stdout:
+            parse_track_line(line, state)
+    if mkv.returncode != 0:
+        mdisc_error = subprocess.CalledProcessError(mkv.returncode, cmd)
         raise MakeMkvRuntimeError(mdisc_error) from mdisc_error
-
-    track = 0
-    fps = float(0)
-    aspect = ""
-    seconds = 0
-    filename = ""
-    for line in mkv:
-        # MSG:3028 - track was added (contains total length and chapter length)
-        # MSG:3025 - too short - track was skipped
-        # MSG:2003 - read error
-        if line.split(":")[0] in ("MSG", "TCOUNT", "CINFO", "TINFO", "SINFO"):
-            line_split = line.split(":", 1)
-            msg_type = line_split[0]
-            msg = line_split[1].split(",")
-            line_track = int(msg[0])
-            # Total track count
-            if msg_type == "TCOUNT":
-                logging.info(f"Found {line_split[1].strip()} titles")
-                utils.database_updater({'no_of_titles': int(line_split[1].strip())}, job)
-            # Title info add track and get filename
-            if msg_type == "TINFO":
-                filename, track = add_track_filename(aspect, filename, fps, job,
-                                                     line_track, msg, seconds, track)
-            # Title length
-            seconds = find_track_length(msg, msg_type, seconds)
-            # Aspect ratio and fps
-            aspect, fps = find_aspect_fps(aspect, msg, msg_type, fps)
     # If we haven't already added any tracks add one with what we have
-    utils.put_track(job, track, seconds, aspect, str(fps), False, "MakeMKV", filename)
+    state.add_track()
+    if state.titles is not None:
+        logging.info(f"Found {state.titles} titles")
+        utils.database_updater({'no_of_titles': state.titles}, job)
+    utils.put_tracks_bulk(job, state.pending)
+
+
+def parse_track_line(line, state):
+    """
+    Hand one line of MakeMKV robot output to the handler for its message type\n
+    :param str line: line from makemkvcon
+    :param TrackState state: details of the current title
+    """
+    # MSG:3028 - track was added (contains total length and chapter length)
+    # MSG:3025 - too short - track was skipped
+    # MSG:2003 - read error
+    msg_type, _, payload = line.rstrip("\n").partition(":")
+    handler = MKV_HANDLERS.get(msg_type)
+    if handler is not None:
+        handler(next(csv.reader([payload])), state)
+
+
+@dataclass
+class TrackState:
+    """
+    Details of the title currently being read from the MakeMKV output
+    """
+    track: int = 0
+    fps: float = 0.0
+    aspect: str = ""
+    seconds: int = 0
+    filename: str = ""
+    titles: Optional[int] = None
+    pending: list = field(default_factory=list)
+
+    def add_track(self):
+        """Queue the current title to be written to the database once parsing is done"""
+        self.pending.append((self.track, self.seconds, self.aspect, str(self.fps), False, "MakeMKV", self.filename))
 
 
-def find_track_length(msg, msg_type, seconds):
+def handle_tcount(msg, state):
     """
-    Find the track length from TINFO msg from MakeMKV\n
-    :param msg: current MakeMKV line split by ','
-    :param msg_type: the message type from MakeMKV
-    :param seconds: length in seconds of file
-    :return: seconds of file
+    Total track count, e.g TCOUNT:12\n
+    :param msg: current MakeMKV line payload split into fields
+    :param TrackState state: details of the current title
     """
-    if msg_type == "TINFO" and msg[1] == "9":
-        len_hms = msg[3].replace('"', '').strip()
-        hour, mins, secs = len_hms.split(':')
-        seconds = int(hour) * 3600 + int(mins) * 60 + int(secs)
-    return seconds
+    state.titles = int(msg[0])
 
 
-def find_aspect_fps(aspect, msg, msg_type, fps):
+def handle_tinfo(msg, state):
     """
-    Search current line and find the file's aspect ratio and fps if msg_type is SINFO\n
-    :param str aspect: aspect ratio (stored as float but db wants string)
-    :param msg: current MakeMKV line split by ','
-    :param msg_type: the message type from MakeMKV
-    :param float fps: fps of file
-    :return: [aspect, fps]
+    Title info - queues the previous track when a new title starts and
+    picks up the track length and filename\n
+    :param msg: current MakeMKV line payload split into fields
+    :param TrackState state: details of the current title
 
     .. note::
-           aspect.msg - ['0', '0', '20', '0', '"16:9"']\n
-           fps.msg - ['0', '0', '21', '0', '"25"']\n
+           length.msg - ['1', '9', '0', '1:32:17']\n
+           filename.msg - ['1', '27', '0', 'title_t01.mkv']\n
+    """
+    line_track = int(msg[0])
+    if state.track != line_track:
+        if line_track != 0:
+            state.add_track()
+        state.track = line_track
+    if msg[1] == "9":
+        hour, mins, secs = msg[3].strip().split(':')
+        state.seconds = int(hour) * 3600 + int(mins) * 60 + int(secs)
+    elif msg[1] == "27":
+        state.filename = msg[3].strip()
+
+
+def handle_sinfo(msg, state):
     """
-    if msg_type == "SINFO" and msg[1] == "0":
+    Stream info - finds the aspect ratio and fps from the first (video) stream\n
+    :param msg: current MakeMKV line payload split into fields
+    :param TrackState state: details of the current title
+
+    .. note::
+           aspect.msg - ['0', '0', '20', '0', '16:9']\n
+           fps.msg - ['0', '0', '21', '0', '25']\n
+    """
+    if msg[1] == "0":
         if msg[2] == "20":
-            # aspect comes wrapped in "" remove them
-            aspect = msg[4].replace('"', '').strip()
+            state.aspect = msg[4].strip()
         elif msg[2] == "21":
-            fps = msg[4].split()[0]
-            fps = fps.replace('"', '').strip()
-            fps = float(fps)
-    return aspect, fps
-
-
-def add_track_filename(aspect, filename, fps, job, line_track, msg, seconds, track):
-    """
-    Only add tracks that weren't previously added ? Also finds filename and removes quotes around it\n
-    :param aspect: Aspect ratio of file
-    :param filename: Filename of file
-    :param fps: FPS of file
-    :param job: Job the track belongs to
-    :param line_track: e.g TINFO: **3** ,8,0,"2"
-    :param msg: current line from MakeMKV split into array
-    :param int seconds: Length of track
-    :param track: Track number of current file
-    :return: [filename, track]
-    """
-    if track != line_track:
-        if line_track != int(0):
-            utils.put_track(job, track, seconds, aspect, fps, False, "MakeMKV", filename)
-        track = line_track
-    if msg[1] == "27":
-        filename = msg[3].replace('"', '').strip()
-    return filename, track
+            # fps can carry the exact ratio after it, e.g. '23.976 (24000/1001)'
+            fps, _, _ = msg[4].strip().partition(" ")
+            state.fps = float(fps)
+
+
+MKV_HANDLERS = {
+    "TCOUNT": handle_tcount,
+    "TINFO": handle_tinfo,
+    "SINFO": handle_sinfo,
+}
 
 
 def run_makemkv(cmd, logfile):
@@ -342,16 +496,21 @@ def run_makemkv(cmd, logfile):
     Run MakeMKV with the command passed to the function.
 
     Parameters:
-        cmd: the command to be run
+        cmd: the command to be run, as a list of arguments
         logfile: Location of logfile to redirect MakeMKV logs to
     Raises:
         MakeMkvRuntimeError
     """
 
-    logging.debug(f"Ripping with the following command: {cmd}")
+    logging.debug("Ripping with the following command: %s", cmd)
+    wait_for_rip_slot()
     try:
         # need to check output for '0 titles saved'
-        subprocess.run(f"{cmd} >> {logfile}", capture_output=True, shell=True, check=True)
+        log_fd = open_mkv_log(logfile)
+        try:
+            subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=log_fd, stderr=subprocess.STDOUT, check=True)
+        finally:
+            os.close(log_fd)
     except subprocess.CalledProcessError as mkv_error:
         raise MakeMkvRuntimeError(mkv_error) from mkv_error
 
@@ -394,7 +553,7 @@ def manual_wait(job) -> bool:
 
         # Refresh job data
         db.session.refresh(job)
-        logging.debug(f"Wait time logging: [{i}] mins - Ready: [{job.manual_start}]")
+        logging.debug("Wait time logging: [%s] mins - Ready: [%s]", i, job.manual_start)
 
         # Check the job state (true once ready)
         if job.manual_start:
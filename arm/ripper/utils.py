@@ -513,7 +513,26 @@ def put_track(job, t_no, seconds, aspect, fps, mainfeature, source, filename="")
     :param str source: Source of information (HandBrake, MakeMKV, abcde)
     :param str filename: filename of track
     """
+    database_adder(make_track(job, t_no, seconds, aspect, fps, mainfeature, source, filename))
 
+
+def put_tracks_bulk(job, tracks):
+    """
+    Put data for several tracks into the database with a single commit\n
+
+    :param job: instance of job class
+    :param list tracks: tuples of (t_no, seconds, aspect, fps, mainfeature, source, filename)
+    in the same order as the arguments of put_track
+    """
+    database_adder([make_track(job, *track) for track in tracks])
+
+
+def make_track(job, t_no, seconds, aspect, fps, mainfeature, source, filename=""):
+    """
+    Build a track instance for put_track and put_tracks_bulk\n
+    Takes the same arguments as put_track
+    :return: Track, not yet added to the database
+    """
     logging.debug(
         f"Track #{int(t_no):02} Length: {seconds: >4} fps: {float(fps):2.3f} "
         f"aspect: {aspect: >4} Mainfeature: {mainfeature} Source: {source}")
@@ -530,7 +549,7 @@ def put_track(job, t_no, seconds, aspect, fps, mainfeature, source, filename="")
         filename=filename
     )
     job_track.ripped = (seconds > int(job.config.MINLENGTH))
-    database_adder(job_track)
+    return job_track
 
 
 def arm_setup(arm_log):
@@ -602,13 +621,20 @@ def database_adder(obj_class):
     """
     Adds model item to db\n
     Used to stop database locked error\n
-    :param obj_class: Job/Config/Track/ etc
+    :param obj_class: Job/Config/Track/ etc, or a list of them to add in one commit
     :return: True if success
     """
+    if isinstance(obj_class, list):
+        obj_name = f"{len(obj_class)} {type(obj_class[0]).__name__ if obj_class else 'objects'}"
+    else:
+        obj_name = type(obj_class).__name__
     for i in range(90):  # give up after the users wait period in seconds
         try:
-            logging.debug(f"Trying to add {type(obj_class).__name__}")
-            db.session.add(obj_class)
+            logging.debug(f"Trying to add {obj_name}")
+            if isinstance(obj_class, list):
+                db.session.add_all(obj_class)
+            else:
+                db.session.add(obj_class)
             db.session.commit()
             break
         except Exception as error:
@@ -618,7 +644,7 @@ def database_adder(obj_class):
             else:
                 logging.error(f"Error: {error}")
                 raise RuntimeError(str(error)) from error
-    logging.debug(f"successfully written {type(obj_class).__name__} to the database")
+    logging.debug(f"successfully written {obj_name} to the database")
     return True
 
 
@@ -0,0 +1,151 @@
+import io
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+import subprocess
+
+sys.path.insert(0, '/opt/arm')
+from arm.ripper import makemkv  # noqa: E402
+from arm.ripper.makemkv import (  # noqa: E402
+    MKV_KEY_ERROR_LIMIT, MakeMkvRuntimeError, TrackState, parse_track_line, prep_mkv, probe_disc, setup_rawpath
+)
+
+
+class TestMakeMkvTrackParser(unittest.TestCase):
+    def test_parse_track_lines(self):
+        """
+        CHECK "parse_track_line" queues one track per title with its length, aspect, fps and filename
+        """
+        lines = [
+            'MSG:1005,0,1,"MakeMKV started","%1 started","MakeMKV"\n',
+            'TCOUNT:2\n',
+            'CINFO:2,0,"MOVIE, THE"\n',
+            'TINFO:0,9,0,"1:32:17"\n',
+            'TINFO:0,27,0,"Movie, The_t00.mkv"\n',
+            'SINFO:0,0,20,0,"16:9"\n',
+            'SINFO:0,0,21,0,"23.976 (24000/1001)"\n',
+            'SINFO:0,1,20,0,"ignored"\n',
+            'TINFO:1,9,0,"0:00:45"\n',
+            'TINFO:1,27,0,"title_t01.mkv"\n',
+            'SINFO:1,0,20,0,"4:3"\n',
+            'SINFO:1,0,21,0,"25"\n',
+        ]
+        state = TrackState()
+        for line in lines:
+            parse_track_line(line, state)
+        state.add_track()
+
+        self.assertEqual(state.titles, 2)
+        self.assertEqual(state.pending, [
+            (0, 5537, "16:9", "23.976", False, "MakeMKV", "Movie, The_t00.mkv"),
+            (1, 45, "4:3", "25.0", False, "MakeMKV", "title_t01.mkv"),
+        ])
+
+
+class TestMakeMkvProbeDisc(unittest.TestCase):
+    drives = (
+        'DRV:0,2,999,1,"BD-RE HL-DT-ST, WH16NS60","MOVIE, THE","/dev/sr0"\n'
+        'DRV:1,2,999,1,"DVD-RW ASUS","OTHER","/dev/sr1"\n'
+        'DRV:2,256,999,0,"","",""\n'
+    )
+
+    @patch("subprocess.run")
+    def test_probe_disc_finds_drive(self, mock_run):
+        """
+        CHECK "probe_disc" returns the MakeMKV disc number for the job's device
+        """
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=self.drives)
+        job = MagicMock(devpath="/dev/sr1")
+
+        self.assertEqual(probe_disc(job), "1")
+
+    @patch("arm.ripper.makemkv.prep_mkv")
+    @patch("subprocess.run")
+    def test_probe_disc_updates_key(self, mock_run, mock_prep_mkv):
+        """
+        CHECK "probe_disc" updates the key and scans again when MakeMKV rejects the key
+        """
+        mock_run.side_effect = [
+            subprocess.CompletedProcess([], 253, stdout=""),
+            subprocess.CompletedProcess([], 0, stdout=self.drives),
+        ]
+        job = MagicMock(devpath="/dev/sr0")
+
+        self.assertEqual(probe_disc(job), "0")
+        mock_prep_mkv.assert_called_once_with()
+        self.assertEqual(mock_run.call_count, 2)
+
+    @patch("subprocess.run")
+    def test_probe_disc_missing_drive(self, mock_run):
+        """
+        CHECK "probe_disc" raises MakeMkvRuntimeError when the device isn't listed
+        """
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=self.drives)
+        job = MagicMock(devpath="/dev/sr5")
+
+        with self.assertRaises(MakeMkvRuntimeError):
+            probe_disc(job)
+
+
+class TestMakeMkvSetupRawpath(unittest.TestCase):
+    def setUp(self):
+        self.job = MagicMock(title="Movie", stage="2024-01-01-12-00-00")
+        self.job.config.RAW_PATH = "/home/arm/media/raw"
+        self.raw_path = "/home/arm/media/raw/Movie"
+
+    @patch("os.makedirs")
+    def test_setup_rawpath_new(self, mock_makedirs):
+        """
+        CHECK "setup_rawpath" creates and returns the requested folder when it doesn't exist
+        """
+        self.assertEqual(setup_rawpath(self.job, self.raw_path), self.raw_path)
+        mock_makedirs.assert_called_once_with(self.raw_path, exist_ok=False)
+
+    @patch("os.makedirs")
+    def test_setup_rawpath_exists(self, mock_makedirs):
+        """
+        CHECK "setup_rawpath" falls back to a title_stage folder when the folder already exists
+        """
+        mock_makedirs.side_effect = [FileExistsError(), None]
+        fallback = "/home/arm/media/raw/Movie_2024-01-01-12-00-00"
+
+        self.assertEqual(setup_rawpath(self.job, self.raw_path), fallback)
+        mock_makedirs.assert_called_with(fallback, exist_ok=True)
+
+    @patch("os.makedirs")
+    def test_setup_rawpath_permissions(self, mock_makedirs):
+        """
+        CHECK "setup_rawpath" logs an error and returns the requested folder when it can't be created
+        """
+        mock_makedirs.side_effect = PermissionError()
+
+        with self.assertLogs(level="ERROR") as logs:
+            self.assertEqual(setup_rawpath(self.job, self.raw_path), self.raw_path)
+        self.assertIn(self.raw_path, logs.output[0])
+        mock_makedirs.assert_called_once_with(self.raw_path, exist_ok=False)
+
+
+class TestMakeMkvPrepMkv(unittest.TestCase):
+    @patch("subprocess.Popen")
+    def test_prep_mkv_error_output_capped(self, mock_popen):
+        """
+        CHECK "prep_mkv" raises RuntimeError on failure and only keeps the start of the error output
+        """
+        stderr = io.BytesIO(b"e" * MKV_KEY_ERROR_LIMIT + b"x" * (MKV_KEY_ERROR_LIMIT * 2 + 10))
+        update = mock_popen.return_value.__enter__.return_value
+        update.stderr = stderr
+        update.returncode = 1
+
+        with patch.object(makemkv.cfg, "arm_config", {"MAKEMKV_PERMA_KEY": ""}), \
+                self.assertLogs(level="ERROR") as logs, \
+                self.assertRaises(RuntimeError):
+            prep_mkv()
+
+        self.assertIn("ERROR:root:" + "e" * MKV_KEY_ERROR_LIMIT, logs.output)
+        self.assertFalse(any("x" * 10 in line for line in logs.output))
+        # The rest of the output is drained so the script can't block on a full pipe
+        self.assertEqual(stderr.read(), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()